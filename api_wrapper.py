@@ -2,16 +2,27 @@
 FastAPI OpenAPI wrapper for your MCP project (no Docker)
 - Captures ALL tools registered via @mcp.tool(...)
 - Tolerates older FastMCP ctor kwargs (filters unknown)
-- Uses FastAPI shutdown hook to call your project's close_pihole_sessions()
-- Endpoints: /healthz, /tools, /call_tool, /debug/introspect
+- Uses a FastAPI lifespan to open/close your project's Pi-hole sessions per worker
+- Endpoints: /healthz, /tools, /call_tool, /debug/introspect, /debug/refresh
 """
 import asyncio
+import functools
+import importlib.util
 import inspect
-from typing import Any, Dict, List, Tuple
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+import msgspec
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
+from starlette.responses import JSONResponse
 
 CAPTURED_TOOLS: Dict[str, Any] = {}
 
@@ -19,45 +30,72 @@ CAPTURED_TOOLS: Dict[str, Any] = {}
 try:
     from mcp.server.fastmcp import FastMCP as _FastMCP
 
-    # Filter unknown kwargs for ctor
-    _orig_init = _FastMCP.__init__
-    _allowed_ctor = set(inspect.signature(_orig_init).parameters.keys())
-
-    def _patched_init(self, *args, **kwargs):
-        for k in list(kwargs.keys()):
-            if k not in _allowed_ctor:
-                kwargs.pop(k, None)
-        return _orig_init(self, *args, **kwargs)
-
-    _FastMCP.__init__ = _patched_init  # type: ignore[attr-defined]
-
-    # Capture tool registrations
-    _orig_tool = getattr(_FastMCP, "tool", None)
-    if callable(_orig_tool):
-        def _patched_tool(self, *targs, **tkwargs):
-            orig_deco = _orig_tool(self, *targs, **tkwargs)
-            def deco(func):
-                tool_name = tkwargs.get("name")
-                if not tool_name:
-                    if targs and isinstance(targs[0], str):
-                        tool_name = targs[0]
-                    else:
-                        tool_name = getattr(func, "__name__", "unnamed_tool")
-                if callable(func):
-                    CAPTURED_TOOLS[tool_name] = func
-                return orig_deco(func)
-            return deco
-        _FastMCP.tool = _patched_tool  # type: ignore[attr-defined]
+    # Patch once per process: `python api_wrapper.py` (and spawned workers) load this file a
+    # second time as `api_wrapper`; that copy shares the first copy's captured tools
+    _already_captured = getattr(_FastMCP, "_pihole_wrapper_captured", None)
+    if isinstance(_already_captured, dict):
+        CAPTURED_TOOLS = _already_captured
+    else:
+        # Filter unknown kwargs for ctor (signature resolved once; wraps() keeps it visible to
+        # main._create_mcp, which inspects FastMCP.__init__ after this patch)
+        _orig_init = _FastMCP.__init__
+        _FASTMCP_ALLOWED = frozenset(inspect.signature(_orig_init).parameters) - {"self"}
+
+        @functools.wraps(_orig_init)
+        def _patched_init(self, *args, **kwargs):
+            kwargs = {k: v for k, v in kwargs.items() if k in _FASTMCP_ALLOWED}
+            return _orig_init(self, *args, **kwargs)
+
+        _FastMCP.__init__ = _patched_init  # type: ignore[attr-defined]
+
+        # Capture tool registrations
+        _orig_tool = getattr(_FastMCP, "tool", None)
+        if callable(_orig_tool):
+            def _patched_tool(self, *targs, **tkwargs):
+                orig_deco = _orig_tool(self, *targs, **tkwargs)
+                def deco(func):
+                    tool_name = tkwargs.get("name")
+                    if not tool_name:
+                        if targs and isinstance(targs[0], str):
+                            tool_name = targs[0]
+                        else:
+                            tool_name = getattr(func, "__name__", "unnamed_tool")
+                    if callable(func):
+                        CAPTURED_TOOLS[tool_name] = func
+                    return orig_deco(func)
+                return deco
+            _FastMCP.tool = _patched_tool  # type: ignore[attr-defined]
+        _FastMCP._pihole_wrapper_captured = CAPTURED_TOOLS  # type: ignore[attr-defined]
 except Exception:
     # mcp gets installed by your start script; if import failed here, the below import will also fail
     pass
 
 # ---- Import your project AFTER patches so tools get captured ----
+# DEFER_PIHOLE_SESSIONS is set on the module before it runs: sessions are opened by the
+# lifespan hook instead, so each worker process gets its own
+def _import_project() -> Any:
+    if "main" in sys.modules:
+        return sys.modules["main"]
+    spec = importlib.util.find_spec("main")
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError("No module named 'main'")
+    module = importlib.util.module_from_spec(spec)
+    module.DEFER_PIHOLE_SESSIONS = True
+    sys.modules["main"] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop("main", None)
+        raise
+    return module
+
 try:
-    import main as project_main
+    project_main = _import_project()
 except Exception as e:
     raise RuntimeError(f"Failed to import your MCP server 'main.py': {e}")
 
+from tools.common import DEFAULT_TOOL_POOL_WORKERS, open_tool_pool, shutdown_tool_pool
+
 mcp = getattr(project_main, "mcp", None)
 if mcp is None:
     raise RuntimeError("Could not find 'mcp' instance in main.py. Ensure main.py defines FastMCP as 'mcp'.")
@@ -137,38 +175,92 @@ def _probe(root: Any) -> Dict[str, Any]:
                 pass
     return found
 
-# Build tool map: captured → probed → EXPOSED_TOOLS fallback
-TOOL_MAP: Dict[str, Any] = dict(CAPTURED_TOOLS)
-if not TOOL_MAP:
-    TOOL_MAP = _probe(mcp)
-if not TOOL_MAP:
-    fallback = getattr(project_main, "EXPOSED_TOOLS", None)
-    if isinstance(fallback, dict) and fallback:
-        TOOL_MAP = {k: v for k, v in fallback.items() if isinstance(k, str) and callable(v)}
+# Modern FastMCP keeps its registry at mcp._tool_manager._tools ({name: Tool}); used by
+# /debug/introspect so it only crawls with _probe when that location is missing
+def _read_tool_manager(root: Any) -> Dict[str, Any]:
+    tools = getattr(getattr(root, "_tool_manager", None), "_tools", None)
+    if not isinstance(tools, dict):
+        return {}
+    return {k: t.fn for k, t in tools.items() if isinstance(k, str) and callable(getattr(t, "fn", None))}
+
+# Build tool map: captured → EXPOSED_TOOLS → probed fallback, exposed as a read-only view
+_tools: Dict[str, Any] = CAPTURED_TOOLS
+if not _tools:
+    exposed = getattr(project_main, "EXPOSED_TOOLS", None)
+    if isinstance(exposed, dict) and exposed:
+        _tools = {k: v for k, v in exposed.items() if isinstance(k, str) and callable(v)}
+if not _tools:
+    _tools = _probe(mcp)
+TOOL_MAP: Mapping[str, Any] = MappingProxyType(_tools)
 if not TOOL_MAP:
     raise RuntimeError("No tools found (capture failed, no registry, and no EXPOSED_TOOLS).")
 
+# Precompute per-tool parameter metadata once; the registry is fixed after import.
+# accepted is None when the signature can't be introspected (pass args through as-is).
+def _param_sets(func: Any) -> Tuple[Optional[FrozenSet[str]], FrozenSet[str]]:
+    try:
+        sig = inspect.signature(func)
+    except (ValueError, TypeError):
+        return None, frozenset()
+    params = [p for p in sig.parameters.values() if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)]
+    accepted = frozenset(p.name for p in params)
+    required = frozenset(p.name for p in params if p.default is p.empty)
+    return accepted, required
+
+TOOL_SIGS: Dict[str, Tuple[Optional[FrozenSet[str]], FrozenSet[str]]] = {
+    name: _param_sets(func) for name, func in TOOL_MAP.items()
+}
+TOOL_IS_ASYNC: Dict[str, bool] = {name: inspect.iscoroutinefunction(func) for name, func in TOOL_MAP.items()}
+
+# Everything call_tool needs per tool, resolved with a single dict lookup per request
+_DISPATCH: Dict[str, Tuple[Any, Optional[FrozenSet[str]], FrozenSet[str], bool]] = {
+    name: (func, *TOOL_SIGS[name], TOOL_IS_ASYNC[name]) for name, func in TOOL_MAP.items()
+}
+
+# /tools and /healthz bodies never change after import; serialize them once (a fresh Response per hit,
+# since middleware such as CORS mutates response headers in place)
+_SORTED_TOOL_NAMES: List[str] = sorted(TOOL_MAP.keys())
+_TOOLS_JSON: bytes = orjson.dumps(_SORTED_TOOL_NAMES)
+_HEALTHZ_JSON: bytes = orjson.dumps({"status": "ok", "tool_count": len(TOOL_MAP)})
+
+# Serialized snapshot of the registry probe for /debug/introspect; built on first hit
+# (keeps the probe off the startup path) and rebuilt only on ?refresh=1 or /debug/refresh
+def _build_introspect() -> bytes:
+    registry = _read_tool_manager(mcp)
+    return orjson.dumps({
+        "captured_count": len(CAPTURED_TOOLS),
+        "captured_keys": sorted(CAPTURED_TOOLS.keys()),
+        "probe_source": "_tool_manager._tools" if registry else "probe",
+        "probe_count": len(registry or _probe(mcp)),
+        "fallback_keys": sorted((getattr(project_main, "EXPOSED_TOOLS", {}) or {}).keys()),
+    })
+
+_INTROSPECT_JSON: Optional[bytes] = None
+
+# Dedicated pool for sync tools, kept apart from the anyio pool FastAPI uses for its own
+# offloads; it is the same pool the async read tools use (tools.common), created and shut
+# down by the lifespan hook so every app run gets a live pool
+_TOOL_POOL: Optional[ThreadPoolExecutor] = None
+
 # ---- FastAPI app ----
-app = FastAPI(
-    title="Pi-hole MCP OpenAPI Wrapper",
-    description="HTTP facade that calls MCP tools in-process",
-    version="0.3.0",
-)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"], allow_credentials=True,
-    allow_methods=["*"], allow_headers=["*"],
-)
+def _orjson_default(obj: Any) -> Any:
+    # orjson covers datetime/UUID natively; defer anything else (sets, Decimal, models) to FastAPI
+    return jsonable_encoder(obj)
 
-# Shutdown hook: call your project's cleanup
+class PiholeJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+# Lifespan: open/close your project's Pi-hole sessions inside each worker
+_open_fn = getattr(project_main, "open_pihole_sessions", None)
 _close_fn = getattr(project_main, "close_pihole_sessions", None)
+_aclose_fn = getattr(project_main, "aclose_pihole_sessions", None)
 _async_cleanup = getattr(project_main, "async_cleanup", None)  # optional
 _shutdown = getattr(project_main, "_shutdown", None)           # optional
 
-@app.on_event("shutdown")
 async def _do_cleanup():
     try:
-        for candidate in (_shutdown, _async_cleanup):
+        for candidate in (_shutdown, _async_cleanup, _aclose_fn):
             if candidate and inspect.iscoroutinefunction(candidate):
                 await candidate()
                 return
@@ -177,55 +269,114 @@ async def _do_cleanup():
     except Exception as e:
         print(f"[wrapper] cleanup error: {e}")
 
-class CallRequest(BaseModel):
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _TOOL_POOL
+    _TOOL_POOL = open_tool_pool(int(os.getenv("TOOL_POOL_WORKERS", str(DEFAULT_TOOL_POOL_WORKERS))))
+    try:
+        if callable(_open_fn):
+            await asyncio.to_thread(_open_fn)
+        yield
+    finally:
+        await _do_cleanup()
+        shutdown_tool_pool()
+        _TOOL_POOL = None
+
+app = FastAPI(
+    title="Pi-hole MCP OpenAPI Wrapper",
+    description="HTTP facade that calls MCP tools in-process",
+    version="0.3.0",
+    default_response_class=PiholeJSONResponse,
+    lifespan=lifespan,
+)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"], allow_credentials=True,
+    allow_methods=["*"], allow_headers=["*"],
+)
+
+class CallRequest(msgspec.Struct):
+    tool: str
+    args: Dict[str, Any] = {}
+
+# Pydantic twin of CallRequest, used only to document the /call_tool body in OpenAPI
+class CallRequestSchema(BaseModel):
     tool: str = Field(..., description="Name of the MCP tool to call")
     args: Dict[str, Any] = Field(default_factory=dict, description="Arguments passed to the tool")
 
+_CALL_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": CallRequestSchema.model_json_schema()}},
+    }
+}
+
 @app.get("/healthz")
 async def healthz():
-    return {"status": "ok", "tool_count": len(TOOL_MAP)}
+    return Response(content=_HEALTHZ_JSON, media_type="application/json")
 
-@app.get("/tools", response_model=List[str])
-async def list_tools() -> List[str]:
-    return sorted(TOOL_MAP.keys())
+# response_model=None: results come from in-process tools, skip FastAPI's outbound validation
+@app.get("/tools", response_model=None)
+async def list_tools() -> Any:
+    return Response(content=_TOOLS_JSON, media_type="application/json")
 
 @app.get("/debug/introspect")
-async def debug_introspect():
-    return {
-        "captured_count": len(CAPTURED_TOOLS),
-        "captured_keys": sorted(CAPTURED_TOOLS.keys()),
-        "probe_count": len(_probe(mcp)),
-        "fallback_keys": sorted((getattr(project_main, "EXPOSED_TOOLS", {}) or {}).keys()),
-    }
+async def debug_introspect(refresh: bool = False):
+    global _INTROSPECT_JSON
+    if refresh or _INTROSPECT_JSON is None:
+        _INTROSPECT_JSON = _build_introspect()
+    return Response(content=_INTROSPECT_JSON, media_type="application/json")
 
-@app.post("/call_tool")
-async def call_tool(req: CallRequest):
-    func = TOOL_MAP.get(req.tool)
-    if func is None:
-        raise HTTPException(status_code=404, detail=f"Tool '{req.tool}' not found")
+@app.post("/debug/refresh")
+async def debug_refresh():
+    global _INTROSPECT_JSON
+    _INTROSPECT_JSON = _build_introspect()
+    return Response(content=_INTROSPECT_JSON, media_type="application/json")
 
-    # Build kwargs from signature
+@app.post("/call_tool", response_model=None, openapi_extra=_CALL_REQUEST_BODY)
+async def call_tool(request: Request):
     try:
-        sig = inspect.signature(func)
-        kwargs = {}
-        for p in sig.parameters.values():
-            if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY):
-                if p.name in req.args:
-                    kwargs[p.name] = req.args[p.name]
-                elif p.default is p.empty and p.name not in req.args:
-                    raise HTTPException(status_code=400, detail=f"Missing required parameter: {p.name}")
-    except (ValueError, TypeError):
+        req = msgspec.json.decode(await request.body(), type=CallRequest)
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid request body: {e}")
+
+    entry = _DISPATCH.get(req.tool)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Tool '{req.tool}' not found")
+    func, accepted, required, is_async = entry
+
+    # Build kwargs from the precomputed signature metadata
+    if accepted is None:
         kwargs = dict(req.args)
+    else:
+        missing = required - req.args.keys()
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing required parameters: {sorted(missing)}")
+        kwargs = {k: v for k, v in req.args.items() if k in accepted}
 
     # Call sync/async tools
     try:
-        if inspect.iscoroutinefunction(func):
+        if is_async:
             result = await func(**kwargs)
         else:
-            result = await asyncio.to_thread(func, **kwargs)
+            result = await asyncio.get_running_loop().run_in_executor(_TOOL_POOL, functools.partial(func, **kwargs))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tool '{req.tool}' raised an error: {e}")
 
-    return {"tool": req.tool, "result": result}
+    return PiholeJSONResponse({"tool": req.tool, "result": result})
+
+if __name__ == "__main__":
+    import uvicorn
+    # Confirmation tokens for DNS deletions live in process memory, so keep one worker
+    # unless requests are pinned to a worker
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # Multiple workers need an import string; a single worker serves this module's app directly
+    uvicorn.run(
+        "api_wrapper:app" if workers > 1 else app,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8812")),
+        workers=workers,
+        access_log=False,
+    )
@@ -2,18 +2,19 @@
 # - Clean shutdown (no sys.exit; no signal handlers when imported)
 # - Tolerant FastMCP ctor (drops unknown kwargs)
 # - Keeps your existing registrations (tools/resources/prompts)
-# - Leaves a sync cleanup function the wrapper can call on FastAPI shutdown
+# - Leaves sync open/cleanup functions the wrapper can call from its FastAPI lifespan
 
 from __future__ import annotations
 
 import os
 import sys
+import asyncio
 import atexit
 import signal
 import logging
 import inspect
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict
 
 # Optional: load env from .env if present
 try:
@@ -62,16 +63,15 @@ def _get_version() -> str:
 # ------------------------------------------------------------------------------
 # Create FastMCP (drop unknown kwargs for older builds)
 # ------------------------------------------------------------------------------
+_FASTMCP_ALLOWED = frozenset(inspect.signature(FastMCP.__init__).parameters) - {"self"}
+
 def _create_mcp() -> FastMCP:
     desired = {
         "name": "PiHoleMCP",
         "version": _get_version(),
         "instructions": "You can manage and inspect Pi-hole instances.",
     }
-    sig = inspect.signature(FastMCP.__init__)
-    allowed = set(sig.parameters.keys())
-    allowed.discard("self")
-    safe = {k: v for k, v in desired.items() if k in allowed}
+    safe = {k: v for k, v in desired.items() if k in _FASTMCP_ALLOWED}
     return FastMCP(**safe) if safe else FastMCP("PiHoleMCP")
 
 mcp = _create_mcp()
@@ -95,29 +95,59 @@ def _add_instance(url_env: str, pw_env: str, name_env: str | None = None):
 # primary (required)
 if not os.getenv("PIHOLE_URL") or not os.getenv("PIHOLE_PASSWORD"):
     raise ValueError("Set PIHOLE_URL and PIHOLE_PASSWORD for the primary Pi-hole.")
-_add_instance("PIHOLE_URL", "PIHOLE_PASSWORD", "PIHOLE_NAME")
 
-# optional 2..4
-for i in (2, 3, 4):
-    _add_instance(f"PIHOLE{i}_URL", f"PIHOLE{i}_PASSWORD", f"PIHOLE{i}_NAME")
+_sessions_closed = False
+
+def open_pihole_sessions() -> None:
+    """Populate pihole_clients in place (tools hold a reference to the dict). No-op while sessions are open."""
+    global _sessions_closed
+    if pihole_clients and not _sessions_closed:
+        return
+    pihole_clients.clear()
+    _add_instance("PIHOLE_URL", "PIHOLE_PASSWORD", "PIHOLE_NAME")
+    # optional 2..4
+    for i in (2, 3, 4):
+        _add_instance(f"PIHOLE{i}_URL", f"PIHOLE{i}_PASSWORD", f"PIHOLE{i}_NAME")
+    _sessions_closed = False
+
+# The wrapper sets DEFER_PIHOLE_SESSIONS on this module before running it and opens sessions
+# per worker in its lifespan hook, since client sessions must not be shared across processes
+if not globals().get("DEFER_PIHOLE_SESSIONS"):
+    open_pihole_sessions()
 
 # ------------------------------------------------------------------------------
-# Cleanup (no sys.exit). Wrapper will also call this during FastAPI shutdown.
+# Cleanup (no sys.exit). Wrapper awaits the async variant during FastAPI shutdown.
 # ------------------------------------------------------------------------------
-_sessions_closed = False
+
+def _close_client(name: str, client: PiHole6Client) -> None:
+    try:
+        client.close_session()
+        base = getattr(client, "base_url", name)
+        logger.info("Successfully closed session for Pi-hole: %s", base)
+    except Exception as e:
+        logger.error("Error closing session for Pi-hole %s: %s", name, e)
+
+async def aclose_pihole_sessions() -> None:
+    """Close all sessions concurrently; shutdown takes the slowest close, not the sum."""
+    global _sessions_closed
+    if _sessions_closed:
+        return
+    logger.info("Closing Pi-hole client sessions...")
+    await asyncio.gather(
+        *(asyncio.to_thread(_close_client, name, client) for name, client in pihole_clients.items()),
+        return_exceptions=True,
+    )
+    _sessions_closed = True
 
 def close_pihole_sessions() -> None:
+    # Serial on purpose: atexit runs after concurrent.futures stops accepting work,
+    # so thread-based fan-out isn't available here
     global _sessions_closed
     if _sessions_closed:
         return
     logger.info("Closing Pi-hole client sessions...")
     for name, client in pihole_clients.items():
-        try:
-            client.close_session()
-            base = getattr(client, "base_url", name)
-            logger.info("Successfully closed session for Pi-hole: %s", base)
-        except Exception as e:
-            logger.error("Error closing session for Pi-hole %s: %s", name, e)
+        _close_client(name, client)
     _sessions_closed = True
 
 atexit.register(close_pihole_sessions)
@@ -140,6 +170,15 @@ config.register_tools(mcp, pihole_clients)
 metrics.register_tools(mcp, pihole_clients)
 guide.register_prompt(mcp)
 
+# ------------------------------------------------------------------------------
+# Explicit tool export for the OpenAPI wrapper (lets it skip probing FastMCP internals)
+# ------------------------------------------------------------------------------
+EXPOSED_TOOLS: Dict[str, Callable[..., Any]] = {
+    name: tool.fn
+    for name, tool in getattr(getattr(mcp, "_tool_manager", None), "_tools", {}).items()
+    if callable(getattr(tool, "fn", None))
+}
+
 # ------------------------------------------------------------------------------
 # Optional: run the SSE app directly (not used by OpenAPI wrapper)
 # ------------------------------------------------------------------------------
@@ -151,4 +190,9 @@ app = mcp.sse_app()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "8000")))
+    uvicorn.run(
+        app,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        access_log=False,
+    )
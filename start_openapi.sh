@@ -5,6 +5,7 @@ PORT="${PORT:-8812}"
 HOST="${HOST:-0.0.0.0}"
 PYTHON_BIN="${PYTHON_BIN:-python3}"
 VENV_DIR="${VENV_DIR:-.venv-openapi}"
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-1}"
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$SCRIPT_DIR"
@@ -32,7 +33,7 @@ python -m pip install --upgrade pip || true
 if [ -f "requirements-openapi.txt" ]; then
   pip install -r requirements-openapi.txt
 else
-  pip install fastapi uvicorn pydantic "mcp[cli]>=1.14" pihole6api
+  pip install fastapi uvicorn uvloop httptools pydantic orjson msgspec "mcp[cli]>=1.14" pihole6api
 fi
 
 # Install project deps if present (NO editable install; your repo is flat)
@@ -44,5 +45,6 @@ if [ -f "requirements.txt" ]; then
   }
 fi
 
-echo "[+] Starting OpenAPI wrapper on ${HOST}:${PORT}"
-exec uvicorn api_wrapper:app --host "${HOST}" --port "${PORT}"
+echo "[+] Starting OpenAPI wrapper on ${HOST}:${PORT} (${WEB_CONCURRENCY} worker(s))"
+exec uvicorn api_wrapper:app --host "${HOST}" --port "${PORT}" --workers "${WEB_CONCURRENCY}" \
+  --no-access-log
@@ -0,0 +1,63 @@
+"""
+Shared helpers for Pi-hole MCP tools
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Bounded pool for blocking pihole6api calls, shared with the OpenAPI wrapper's sync
+# tool dispatch so TOOL_POOL_WORKERS caps all Pi-hole I/O in one place
+DEFAULT_TOOL_POOL_WORKERS = 16
+
+_tool_pool: Optional[ThreadPoolExecutor] = None
+_tool_pool_lock = threading.Lock()
+
+def open_tool_pool(max_workers: Optional[int] = None) -> ThreadPoolExecutor:
+    """
+    Return the shared tool pool, creating it on first use
+
+    Args:
+        max_workers: Pool size when the pool is created here (default: DEFAULT_TOOL_POOL_WORKERS)
+    """
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(
+                max_workers=max_workers or DEFAULT_TOOL_POOL_WORKERS,
+                thread_name_prefix="pihole-tool",
+            )
+        return _tool_pool
+
+def shutdown_tool_pool() -> None:
+    """Shut down the shared tool pool; the next open_tool_pool() call creates a fresh one."""
+    global _tool_pool
+    with _tool_pool_lock:
+        pool, _tool_pool = _tool_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+async def query_piholes(pihole_clients, targets: Iterable[str], call: Callable[[Any], Any]) -> List[Dict[str, Any]]:
+    """
+    Run a read-only client call against several Pi-holes concurrently
+
+    Each blocking pihole6api call runs on the shared tool pool, so a slow instance no
+    longer delays the others. Results keep the order of targets.
+
+    Args:
+        pihole_clients: Mapping of Pi-hole name to client
+        targets: Names of the Pi-holes to query
+        call: Function taking a client and returning its data
+    """
+    loop = asyncio.get_running_loop()
+    pool = open_tool_pool()
+
+    async def query_one(name: str) -> Dict[str, Any]:
+        try:
+            data = await loop.run_in_executor(pool, call, pihole_clients[name])
+            return {"pihole": name, "data": data}
+        except Exception as e:
+            return {"pihole": name, "error": str(e)}
+
+    return list(await asyncio.gather(*(query_one(name) for name in targets)))
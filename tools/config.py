@@ -7,6 +7,8 @@ import time
 import secrets
 import threading
 
+from .common import query_piholes
+
 # Store pending deletion confirmations with expiration
 # Structure: {"token": {"host": host, "expires": timestamp, "piholes": [...], "records": [...]}}
 pending_deletions = {}
@@ -27,27 +29,17 @@ def register_tools(mcp, pihole_clients):
     """Register configuration-related tools with the MCP server."""
 
     @mcp.tool(name="list_local_dns", description="List local A and CNAME records from Pi-hole")
-    def list_local_dns(piholes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    async def list_local_dns(piholes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         List all local DNS records (A and CNAME) from Pi-hole
         
         Args:
             piholes: Optional list of Pi-hole names to query. If None, query all configured Pi-holes.
         """
-        result = []
-        
         # Determine which Pi-holes to query
         targets = pihole_clients.keys() if piholes is None else [p for p in piholes if p in pihole_clients]
         
-        for name in targets:
-            client = pihole_clients[name]
-            try:
-                data = client.config.get_config_section('dns')
-                result.append({"pihole": name, "data": data})
-            except Exception as e:
-                result.append({"pihole": name, "error": str(e)})
-        
-        return result
+        return await query_piholes(pihole_clients, targets, lambda client: client.config.get_config_section('dns'))
     
     @mcp.tool(name="add_local_a_record", description="Add a local A record to Pi-hole")
     def add_local_a_record(host: str, ip: str, pihole: Optional[str] = None) -> Dict[str, Any]:
@@ -4,11 +4,13 @@ Pi-hole MCP metrics tools
 
 from typing import List, Dict, Optional, Any
 
+from .common import query_piholes
+
 def register_tools(mcp, pihole_clients):
     """Register metrics-related tools with the MCP server."""
 
     @mcp.tool(name="list_queries", description="Fetch recent DNS query history with filtering options")
-    def list_queries(
+    async def list_queries(
         piholes: Optional[List[str]] = None,
         length: int = 10,
         from_ts: Optional[int] = None,
@@ -41,31 +43,25 @@ def register_tools(mcp, pihole_clients):
             client_filter: Filter queries originating from a specific client, supports wildcards (*)
             cursor: Cursor for pagination to fetch the next chunk of results
         """
-        result = []
-        
         # Determine which Pi-holes to query
         targets = pihole_clients.keys() if piholes is None else [p for p in piholes if p in pihole_clients]
         
-        for name in targets:
-            client = pihole_clients[name]
-            try:
-                data = client.metrics.get_queries(
-                    length=length,
-                    from_ts=from_ts,
-                    until_ts=until_ts,
-                    upstream=upstream,
-                    domain=domain,
-                    client=client_filter,  # Use client_filter to avoid name conflict with client variable
-                    cursor=cursor
-                )
-                result.append({"pihole": name, "data": data})
-            except Exception as e:
-                result.append({"pihole": name, "error": str(e)})
-        
-        return result
+        return await query_piholes(
+            pihole_clients,
+            targets,
+            lambda client: client.metrics.get_queries(
+                length=length,
+                from_ts=from_ts,
+                until_ts=until_ts,
+                upstream=upstream,
+                domain=domain,
+                client=client_filter,  # Use client_filter to avoid name conflict with client variable
+                cursor=cursor
+            ),
+        )
 
     @mcp.tool(name="list_query_suggestions", description="Get query filter suggestions for Pi-hole query data")
-    def list_query_suggestions(piholes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    async def list_query_suggestions(piholes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Get query filter suggestions for all available filters from Pi-hole
         
@@ -75,23 +71,13 @@ def register_tools(mcp, pihole_clients):
         Returns:
             List of dictionaries containing suggestions for domains, clients, upstreams, query types, statuses, replies, and dnssec options
         """
-        result = []
-        
         # Determine which Pi-holes to query
         targets = pihole_clients.keys() if piholes is None else [p for p in piholes if p in pihole_clients]
         
-        for name in targets:
-            client = pihole_clients[name]
-            try:
-                data = client.metrics.get_query_suggestions()
-                result.append({"pihole": name, "data": data})
-            except Exception as e:
-                result.append({"pihole": name, "error": str(e)})
-        
-        return result
+        return await query_piholes(pihole_clients, targets, lambda client: client.metrics.get_query_suggestions())
 
     @mcp.tool(name="list_query_history", description="Get activity graph data for Pi-hole queries over time")
-    def list_query_history(piholes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    async def list_query_history(piholes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Get activity graph data showing the distribution of queries over time
         
@@ -106,17 +92,7 @@ def register_tools(mcp, pihole_clients):
         Returns:
             List of dictionaries containing activity graph data for each Pi-hole
         """
-        result = []
-        
         # Determine which Pi-holes to query
         targets = pihole_clients.keys() if piholes is None else [p for p in piholes if p in pihole_clients]
         
-        for name in targets:
-            client = pihole_clients[name]
-            try:
-                data = client.metrics.get_history()
-                result.append({"pihole": name, "data": data})
-            except Exception as e:
-                result.append({"pihole": name, "error": str(e)})
-        
-        return result 
\ No newline at end of file
+        return await query_piholes(pihole_clients, targets, lambda client: client.metrics.get_history()) 
\ No newline at end of file